@@ -7,8 +7,22 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_SERVER: str = "db"
     POSTGRES_PORT: str = "5432"
-    DATABASE_URL: PostgresDsn | None = None
+    DATABASE_URL: PostgresDsn | str | None = None  # str allows sqlite:// for test runs
     DATABASE_URL_TEST: PostgresDsn | None = None
+    FAST_STARTUP: bool = False  # trust the schema stamp, start the voice workers on first use
+    VOICE_WORKERS: int = 2
+    VOICE_UPLOAD_DIR: str = "/tmp/smartspend/voice"
+    VOICE_MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    VOICE_JOB_TTL_SECONDS: int = 3600
+    VOICE_TRANSCRIBER: str = "openai"  # "openai", "whisper" or "stub"
+    VOICE_TRANSCRIBER_MODEL: str | None = None
+    VOICE_PARSER: str = "openai"  # "openai" or "stub"
+    VOICE_PARSER_MODEL: str | None = None
+    VOICE_STUB_DELAY: float = 0.0
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 7 * 24 * 3600  # /sync replays keys this long, older ones are pruned
+    SQL_PROFILE: bool = False  # profile every request; dev and load tests only, see README.md
+    SQL_PROFILE_HEADER: str | None = None  # e.g. "X-SQL-Profile", profile only requests sending it
+    SQL_PROFILE_REPORT: str | None = None  # per-route JSON report written at shutdown
     class Config:
         env_file = "../.env"
         case_sensitive = True
@@ -1,12 +1,93 @@
-from sqlmodel import create_engine, Session, SQLModel
+import hashlib
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import create_engine, delete, Field, insert, Session, SQLModel
 from ..core.config import settings
 from typing import Annotated
 from fastapi import Depends
 
-engine = create_engine(str(settings.DATABASE_URL))
+database_url = str(settings.DATABASE_URL)
+connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+engine = create_engine(database_url, connect_args=connect_args)
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaVersion(SQLModel, table=True):
+    __tablename__ = "schema_version"
+    version: str = Field(primary_key=True, max_length=64)
+
+
+def schema_fingerprint() -> str:
+    """Hash of the tables, columns and indexes declared on the models."""
+    from .. import models  # noqa: F401 - registers the tables on the metadata
+
+    digest = hashlib.sha256()
+    for table in SQLModel.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(repr((column.name, repr(column.type), column.nullable, column.primary_key)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            digest.update(repr((index.name, [c.name for c in index.columns], index.unique)).encode())
+    return digest.hexdigest()
+
+
+def create_indexes(connection, missing=()):
+    """Create declared indexes missing from existing tables.
+
+    create_all() only indexes the tables it creates, so an index added to a
+    model later never reaches a database that already has the table. Indexes
+    over `missing` columns are left out.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if any(f"{table.name}.{column.name}" in missing for column in index.columns):
+                continue
+            # _invoke_with() honours ddl_if(), e.g. the PostgreSQL-only trigram indexes
+            CreateIndex(index, if_not_exists=True)._invoke_with(connection)
+
+
+def missing_columns(connection) -> list[str]:
+    """Declared columns the database lacks; create_all() never alters tables."""
+    inspector = inspect(connection)
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    return missing
+
 
 def create_database():
+    # In fast startup mode a matching stamp means the schema is already in
+    # place, which spares create_all() reflecting every table on each boot.
+    version = schema_fingerprint()
+    if settings.FAST_STARTUP:
+        try:
+            with Session(engine) as session:
+                if session.get(SchemaVersion, version) is not None:
+                    return
+        except DBAPIError:
+            pass  # no stamp table yet
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        missing = missing_columns(connection)
+        create_indexes(connection, missing)
+        if missing:
+            # Stamping now would let fast startup skip the check for good.
+            logger.warning("Schema not stamped, columns missing: %s", ", ".join(missing))
+            return
+        connection.execute(delete(SchemaVersion).where(SchemaVersion.version != version))
+    # Workers booting together all try to stamp the same version.
+    try:
+        with engine.begin() as connection:
+            connection.execute(insert(SchemaVersion).values(version=version))
+    except IntegrityError:
+        pass
 
 def get_session():
     with Session(engine) as session:
@@ -0,0 +1,223 @@
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-request SQL profiling. Engine events record every statement executed
+# while a request is being profiled; the ASGI middleware decides which
+# requests are profiled and folds each one into a per-route report.
+# Meant for development and load tests only: in header mode any client can
+# turn profiling on for its own requests.
+
+N_PLUS_ONE_THRESHOLD = 3
+UNMATCHED_ROUTE = "<unmatched>"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_ROWS_LIST = re.compile(r"\(\.\.\.\)(?:, \(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+_SELECT_TABLE = re.compile(r"^SELECT .+? FROM (\w+)", re.IGNORECASE)
+_PK_LOOKUP = re.compile(r"WHERE \w+\.\w+ = \?$", re.IGNORECASE)
+_WRITE_TABLE = re.compile(r"^(?:INSERT INTO|UPDATE|DELETE FROM) (\w+)", re.IGNORECASE)
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with literals and parameters replaced by '?' and lists folded."""
+    normalized = _SPACE.sub(" ", statement).strip()
+    normalized = _STRING.sub("?", normalized)
+    normalized = _PARAM.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("(...)", normalized)
+    return _ROWS_LIST.sub("(...)", normalized)
+
+
+@dataclass
+class Query:
+    statement: str
+    fingerprint: str
+    duration_ms: float
+    rows: int | None  # None when the driver does not report it, e.g. SQLite SELECTs
+    executemany: bool = False
+
+
+@dataclass
+class RequestProfile:
+    route: str
+    queries: list[Query] = field(default_factory=list)
+    commits: int = 0
+    reloads: list[str] = field(default_factory=list)
+    # tables written in the open transaction and in the last committed one
+    _writing: set[str] = field(default_factory=set)
+    _committed: set[str] = field(default_factory=set)
+
+    def record(self, query: Query):
+        self.queries.append(query)
+        write = _WRITE_TABLE.match(query.fingerprint)
+        if write:
+            self._writing.add(write.group(1).strip('"'))
+            return
+        select = _SELECT_TABLE.match(query.fingerprint)
+        if select and select.group(1) in self._committed and _PK_LOOKUP.search(query.fingerprint):
+            self.reloads.append(query.fingerprint)
+
+    def commit(self):
+        self.commits += 1
+        self._committed = self._writing
+        self._writing = set()
+
+    @property
+    def n_plus_one(self) -> dict[str, int]:
+        counts = Counter(q.fingerprint for q in self.queries if q.fingerprint.upper().startswith("SELECT"))
+        return {fp: n for fp, n in counts.items() if n >= N_PLUS_ONE_THRESHOLD}
+
+    @property
+    def duration_ms(self) -> float:
+        return sum(q.duration_ms for q in self.queries)
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("sql_profile", default=None)
+
+
+class SQLProfiler:
+    """Collects request profiles and aggregates them per route."""
+
+    def __init__(self, *, always: bool = False, header: str | None = None, report_path: str | None = None):
+        self.always = always
+        self.header = header.lower().encode() if header else None
+        self.report_path = report_path
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def instrument(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "commit", _commit)
+
+    def wants(self, scope) -> bool:
+        if self.always:
+            return True
+        if self.header is None:
+            return False
+        return any(name == self.header and value not in (b"", b"0", b"false") for name, value in scope["headers"])
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            route = self._routes.setdefault(profile.route, {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "commits": 0,
+                "duration_ms": 0.0,
+                "fingerprints": defaultdict(lambda: {"count": 0, "duration_ms": 0.0, "rows": None}),
+                "n_plus_one": Counter(),
+                "reloads": Counter(),
+            })
+            route["requests"] += 1
+            route["queries"] += len(profile.queries)
+            route["max_queries"] = max(route["max_queries"], len(profile.queries))
+            route["commits"] += profile.commits
+            route["duration_ms"] += profile.duration_ms
+            for query in profile.queries:
+                stats = route["fingerprints"][query.fingerprint]
+                stats["count"] += 1
+                stats["duration_ms"] += query.duration_ms
+                if query.rows is not None:
+                    stats["rows"] = (stats["rows"] or 0) + query.rows
+            route["n_plus_one"].update(profile.n_plus_one.keys())
+            route["reloads"].update(profile.reloads)
+
+    def report(self) -> dict[str, dict]:
+        """Per-route totals; `n_plus_one` and `reloads` count the requests that hit each pattern."""
+        with self._lock:
+            return {
+                name: {
+                    **route,
+                    "avg_queries": route["queries"] / route["requests"],
+                    "fingerprints": dict(sorted(
+                        route["fingerprints"].items(), key=lambda item: item[1]["count"], reverse=True
+                    )),
+                    "n_plus_one": dict(route["n_plus_one"]),
+                    "reloads": dict(route["reloads"]),
+                }
+                for name, route in self._routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def write_report(self, path: str | None = None):
+        path = path or self.report_path
+        if path:
+            with open(path, "w") as f:
+                json.dump(self.report(), f, indent=2)
+
+
+# The start time lives on the execution context, which ends with the
+# statement; conn.info would outlive the request on a pooled connection.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context._sql_profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    start = getattr(context, "_sql_profile_start", None)
+    if profile is None or start is None:
+        return
+    duration_ms = 1000 * (time.perf_counter() - start)
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    profile.record(Query(statement, fingerprint(statement), duration_ms, rows, executemany))
+
+
+def _commit(conn):
+    profile = _current.get()
+    if profile is not None:
+        profile.commit()
+
+
+class SQLProfilerMiddleware:
+    def __init__(self, app, profiler: SQLProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope):
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(route=f"{scope['method']} {scope['path']}")
+        token = _current.set(profile)
+
+        async def send_with_summary(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-queries", str(len(profile.queries)).encode()))
+                headers.append((b"x-sql-time-ms", f"{profile.duration_ms:.2f}".encode()))
+                warnings = (["n+1"] if profile.n_plus_one else []) + (["reload"] if profile.reloads else [])
+                if warnings:
+                    headers.append((b"x-sql-warnings", ",".join(warnings).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            _current.reset(token)
+            # The router stores the matched route in the scope, so the report
+            # groups by path template instead of by concrete path. Requests
+            # matching no route share one entry, or arbitrary paths would
+            # grow the report without bound.
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                profile.route = f"{scope['method']} {route.path}"
+            else:
+                profile.route = f"{scope['method']} {UNMATCHED_ROUTE}"
+            self.profiler.add(profile)
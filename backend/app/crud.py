@@ -0,0 +1,164 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from pydantic import ValidationError
+from sqlmodel import Session, SQLModel, delete, insert, select, update
+
+from .models import (
+    Activity,
+    BatchEntity,
+    BatchOp,
+    BatchOperation,
+    BatchResult,
+    IdempotencyKey,
+    Income,
+    TargetBudget,
+)
+
+BATCH_MODELS: dict[BatchEntity, type[SQLModel]] = {
+    BatchEntity.ACTIVITY: Activity,
+    BatchEntity.INCOME: Income,
+    BatchEntity.TARGET_BUDGET: TargetBudget,
+}
+
+
+class BatchError(ValueError):
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Operation {index}: {message}")
+
+
+def _primary_key(model: type[SQLModel]):
+    return model.__table__.primary_key.columns[0]
+
+
+def _validate(model: type[SQLModel], index: int, values: dict) -> dict:
+    pk = _primary_key(model).name
+    unknown = set(values) - set(model.model_fields) - {pk}
+    if unknown:
+        raise BatchError(index, f"unknown fields {sorted(unknown)}")
+    try:
+        return model.model_validate(values).model_dump()
+    except ValidationError as e:
+        raise BatchError(index, str(e))
+
+
+def apply_batch(
+    session: Session, account_id: int, operations: list[BatchOperation], *, key_ttl: int | None = None
+) -> list[BatchResult]:
+    """Apply a batch of create/update/delete operations without committing.
+
+    Operations whose key was already recorded for the account are replayed
+    from the record instead of applied again. With `key_ttl` the account's
+    keys older than that many seconds are pruned first. New operations run grouped by
+    kind: creates, then updates, then deletes, each with one statement per
+    entity type. Raises BatchError if any operation is invalid, in which case
+    the caller must roll back.
+    """
+    now = datetime.now(timezone.utc)
+    if key_ttl is not None:
+        session.exec(delete(IdempotencyKey).where(
+            IdempotencyKey.account_id == account_id, IdempotencyKey.created_at < now - timedelta(seconds=key_ttl)
+        ))
+
+    keys = [operation.key for operation in operations]
+    recorded = {
+        row.key: row
+        for row in session.exec(
+            select(IdempotencyKey).where(
+                IdempotencyKey.account_id == account_id, IdempotencyKey.key.in_(keys)
+            )
+        )
+    }
+
+    results: list[BatchResult | None] = [None] * len(operations)
+    creates = defaultdict(list)
+    changes = defaultdict(list)
+    seen_keys = set()
+    for index, operation in enumerate(operations):
+        if operation.key in seen_keys:
+            raise BatchError(index, f"duplicate key {operation.key!r}")
+        seen_keys.add(operation.key)
+
+        record = recorded.get(operation.key)
+        if record is not None:
+            if (record.op, record.entity) != (operation.op, operation.entity) or (
+                operation.op != BatchOp.CREATE and record.entity_id != operation.id
+            ):
+                raise BatchError(index, f"key {operation.key!r} was used for a different operation")
+            results[index] = BatchResult(
+                key=operation.key, op=operation.op, entity=operation.entity, id=record.entity_id, replayed=True
+            )
+        elif operation.op == BatchOp.CREATE:
+            if operation.id is not None:
+                raise BatchError(index, "create must not set an id")
+            model = BATCH_MODELS[operation.entity]
+            values = _validate(model, index, {**operation.data, "account_id": account_id})
+            values.pop(_primary_key(model).name)
+            creates[operation.entity].append((index, values))
+        else:
+            if operation.id is None:
+                raise BatchError(index, f"{operation.op.value} requires an id")
+            changes[operation.entity].append((index, operation))
+
+    updates = defaultdict(list)
+    deletes = defaultdict(list)
+    for entity, items in changes.items():
+        model = BATCH_MODELS[entity]
+        pk = _primary_key(model)
+        # One SELECT per entity type checks ownership and loads the rows the
+        # updates are merged into.
+        current = {
+            row._mapping[pk.name]: dict(row._mapping)
+            for row in session.exec(
+                select(*model.__table__.columns).where(
+                    pk.in_([op.id for _, op in items]), model.account_id == account_id
+                )
+            )
+        }
+        touched = set()
+        for index, operation in items:
+            if operation.id not in current:
+                raise BatchError(index, f"{entity.value} {operation.id} not found")
+            if operation.id in touched:
+                raise BatchError(index, f"{entity.value} {operation.id} appears twice in the batch")
+            touched.add(operation.id)
+            if operation.op == BatchOp.DELETE:
+                deletes[entity].append((index, operation.id))
+            else:
+                values = _validate(model, index, {**current[operation.id], **operation.data, "account_id": account_id})
+                values[pk.name] = operation.id
+                updates[entity].append((index, values))
+
+    applied = []
+    for entity, items in creates.items():
+        model = BATCH_MODELS[entity]
+        ids = session.exec(
+            insert(model).returning(_primary_key(model), sort_by_parameter_order=True),
+            params=[values for _, values in items],
+        ).scalars().all()
+        applied.extend((index, entity_id) for (index, _), entity_id in zip(items, ids))
+    for entity, items in updates.items():
+        session.exec(update(BATCH_MODELS[entity]), params=[values for _, values in items])
+        pk = _primary_key(BATCH_MODELS[entity]).name
+        applied.extend((index, values[pk]) for index, values in items)
+    for entity, items in deletes.items():
+        model = BATCH_MODELS[entity]
+        session.exec(delete(model).where(_primary_key(model).in_([entity_id for _, entity_id in items])))
+        applied.extend(items)
+
+    if applied:
+        session.exec(insert(IdempotencyKey), params=[
+            {
+                "account_id": account_id,
+                "key": operations[index].key,
+                "op": operations[index].op,
+                "entity": operations[index].entity,
+                "entity_id": entity_id,
+                "created_at": now,
+            }
+            for index, entity_id in applied
+        ])
+    for index, entity_id in applied:
+        operation = operations[index]
+        results[index] = BatchResult(key=operation.key, op=operation.op, entity=operation.entity, id=entity_id)
+    return results
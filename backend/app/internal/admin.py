@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import select
 from ..core.db import SessionDep
 from ..models import Account
@@ -21,4 +21,16 @@ async def add_new_account(account: Account, session: SessionDep):
 @router.get("/")
 async def get_all_accounts(session: SessionDep):
     accounts = session.exec(select(Account)).all()
-    return accounts
\ No newline at end of file
+    return accounts
+
+# The report exposes every profiled statement, so it needs the admin token
+# even though the rest of this router does not yet.
+@router.get("/sql-profile", dependencies=[Depends(get_token_header)])
+async def get_sql_profile(request: Request, reset: bool = False):
+    profiler = request.app.state.sql_profiler
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="SQL profiling is disabled")
+    report = profiler.report()
+    if reset:
+        profiler.reset()
+    return report
\ No newline at end of file
@@ -1,19 +1,28 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import account, activity, voice, auth
+from app.routers import account, activity, voice, auth, sync
 from app.dependencies import get_query_token
 from app.internal import admin
+from app.core.config import settings
 from app.core.db import create_database, engine
+from app.core.profiler import SQLProfiler, SQLProfilerMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_database()
+    if not settings.FAST_STARTUP:
+        await voice.queue.start()
     yield
+    # Waits for in-flight jobs, which must not block the event loop.
+    await asyncio.to_thread(voice.queue.shutdown)
+    if app.state.sql_profiler is not None:
+        app.state.sql_profiler.write_report()
     engine.dispose()
 
 # app = FastAPI(dependencies=[Depends(get_query_token)], lifespan=lifespan)
@@ -27,7 +36,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.state.sql_profiler = None
+if settings.SQL_PROFILE or settings.SQL_PROFILE_HEADER:
+    app.state.sql_profiler = SQLProfiler(
+        always=settings.SQL_PROFILE,
+        header=settings.SQL_PROFILE_HEADER,
+        report_path=settings.SQL_PROFILE_REPORT,
+    )
+    app.state.sql_profiler.instrument(engine)
+    app.add_middleware(SQLProfilerMiddleware, profiler=app.state.sql_profiler)
+
 app.include_router(router=admin.router)
 app.include_router(router=auth.router)
 app.include_router(router=account.router)
-app.include_router(router=activity.router)
\ No newline at end of file
+app.include_router(router=activity.router)
+app.include_router(router=voice.router)
+app.include_router(router=sync.router)
\ No newline at end of file
@@ -1,6 +1,7 @@
-from datetime import date, time, datetime
+from datetime import date, time, datetime, timezone
+from sqlalchemy import DDL, DateTime, Index, event
 from sqlmodel import Field, Relationship, SQLModel
-from typing import List, Optional
+from typing import Any, List, Optional
 from enum import Enum
 from pydantic import BaseModel
 from typing import List, Optional
@@ -122,9 +123,22 @@ class ActivityBase(SQLModel):
 
 class Activity(ActivityBase, table=True):
     __tablename__ = "activity"
+    __table_args__ = (
+        # Trigram indexes back substring and fuzzy search, see app/search.py
+        Index("ix_activity_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_activity_description_trgm", "description", postgresql_using="gin",
+              postgresql_ops={"description": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
     activity_id: Optional[int] = Field(default=None, primary_key=True)
     account_id: int = Field(foreign_key="account.account_id", index=True)
 
+event.listen(
+    SQLModel.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class ActivityCreate(ActivityBase):
     account_id: int
     pass
@@ -133,6 +147,13 @@ class ActivityPublic(ActivityBase):
     activity_id: int
     account_id: int
 
+class ActivitySearchHit(ActivityPublic):
+    score: float
+
+class ActivitySearchPage(SQLModel):
+    items: list[ActivitySearchHit]
+    next_cursor: str | None = None
+
 ####################
 
 class TargetBudget(SQLModel, table=True):
@@ -160,4 +181,61 @@ class SpendPublic(SQLModel):
     year: int = Field(le=3000, ge=1900)
     month: int | None = Field(default=None, ge=1, le=12)
     day: int | None = Field(default=None,ge=1, le=31)
-    totalSpend: float = Field(ge=0.0)
\ No newline at end of file
+    totalSpend: float = Field(ge=0.0)
+
+#######################
+
+class VoiceJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class VoiceJobPublic(SQLModel):
+    job_id: str
+    status: VoiceJobStatus
+    position: int | None = None  # jobs ahead of this one while queued
+    result: ActivityBase | None = None
+    error: str | None = None
+
+
+#######################
+
+class BatchOp(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+class BatchEntity(str, Enum):
+    ACTIVITY = "activity"
+    INCOME = "income"
+    TARGET_BUDGET = "target_budget"
+
+class BatchOperation(SQLModel):
+    key: str = Field(min_length=1, max_length=64)  # client idempotency key, unique per account
+    op: BatchOp
+    entity: BatchEntity
+    id: int | None = None  # required for update and delete
+    data: dict[str, Any] = Field(default_factory=dict)
+
+class BatchRequest(SQLModel):
+    operations: list[BatchOperation] = Field(min_length=1, max_length=1000)
+
+class BatchResult(SQLModel):
+    key: str
+    op: BatchOp
+    entity: BatchEntity
+    id: int
+    replayed: bool = False  # applied by an earlier request with the same key
+
+class BatchResponse(SQLModel):
+    results: list[BatchResult]
+
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_key"
+    account_id: int = Field(foreign_key="account.account_id", primary_key=True)
+    key: str = Field(max_length=64, primary_key=True)
+    op: BatchOp
+    entity: BatchEntity
+    entity_id: int
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True))
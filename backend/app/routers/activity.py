@@ -4,9 +4,10 @@ from sqlmodel import select, func, or_
 from typing import Annotated
 from datetime import date, datetime
 
-from ..models import Activity, ActivityCreate, ActivityPublic, Category, RecurrenceType, SpendPublic
+from ..models import Activity, ActivityCreate, ActivityPublic, ActivitySearchPage, Category, RecurrenceType, SpendPublic
 
 from ..core.db import SessionDep
+from ..search import search_activities
 
 router = APIRouter(
     prefix="/activity",
@@ -28,6 +29,34 @@ def get_activities(*,account_id: int,offset: Annotated[int, Query(ge=0)] = 0, li
     result = session.exec(statement).all()
     return result
 
+@router.get("/search/{account_id}", response_model=ActivitySearchPage)
+def search_account_activities(*,
+    account_id: int,
+    q: Annotated[str, Query(min_length=1, max_length=255)],
+    category: Category | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    session: SessionDep
+):
+    """
+    Fuzzy search over an account's activity names and descriptions, best match first. Pass
+    `next_cursor` back as `cursor` for the next page.
+
+    PostgreSQL answers from the GIN trigram indexes; the target of 50 ms at 1M activities has
+    not been measured yet (`python -m benchmarks.activity_search --database-url ... --explain`).
+    Other databases use an in-process fallback meant for tests only: the first search of an
+    account indexes all its activities (about 2 s per 20k) and queries take tens of ms at 20k.
+    """
+    try:
+        return search_activities(
+            session, account_id, q,
+            category=category, date_from=date_from, date_to=date_to, cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/spending/year/{account_id}") 
 def get_spending_in_year(
     *, account_id: int, 
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from ..core.config import settings
+from ..core.db import SessionDep
+from ..crud import BatchError, apply_batch
+from ..models import Account, BatchEntity, BatchRequest, BatchResponse
+from ..search import activity_index
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"],
+)
+
+@router.post("/{account_id}", response_model=BatchResponse)
+def sync_account(account_id: int, batch: BatchRequest, session: SessionDep):
+    """
+    Apply a batch of offline edits in one transaction. Resending the same batch is safe,
+    operations whose key was already applied return their original id.
+    """
+    if session.get(Account, account_id) is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    # A concurrent request with the same keys makes the key insert fail; the
+    # second attempt then replays them.
+    for attempt in range(2):
+        try:
+            results = apply_batch(session, account_id, batch.operations, key_ttl=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            session.commit()
+            break
+        except BatchError as e:
+            session.rollback()
+            raise HTTPException(status_code=422, detail=str(e))
+        except IntegrityError:
+            session.rollback()
+            if attempt:
+                raise HTTPException(status_code=409, detail="Batch conflicts with existing data")
+    if any(operation.entity == BatchEntity.ACTIVITY for operation in batch.operations):
+        activity_index.invalidate(account_id)
+    return BatchResponse(results=results)
@@ -1,58 +1,88 @@
-# from fastapi import APIRouter, UploadFile, HTTPException
-# from fastapi.responses import JSONResponse
-# from pydantic import BaseModel
-# from openai import OpenAI
-# from llama_index.core import VectorStoreIndex
-# from llama_index.core.schema import Document
-
-# client = OpenAI()  # assumes OPENAI_API_KEY is set in your environment
-
-# router = APIRouter(
-#     prefix="/voice",
-#     tags=["Voice"],
-# )
-
-# class ActivityJSON(BaseModel):
-#     name: str
-#     description: str
-#     expense: float
-#     location: str
-#     category: str
-#     repeat: bool
-#     interval: str  # "none", "daily", "weekly", "monthly", "yearly"
-
-# @router.post("/process", response_model=ActivityJSON)
-# async def process_voice_message(file: UploadFile):
-#     """
-#     Endpoint to process a voice message and convert it into a structured JSON object.
-#     """
-#     try:
-#         # Step 1: Save file temporarily
-#         contents = await file.read()
-#         temp_path = f"/tmp/{file.filename}"
-#         with open(temp_path, "wb") as f:
-#             f.write(contents)
-
-#         # Step 2: Transcribe using new OpenAI API client
-#         with open(temp_path, "rb") as f:
-#             transcription_response = client.audio.transcriptions.create(
-#                 model="whisper-1",
-#                 file=f
-#             )
-#         transcribed_text = transcription_response.text
-#         print(f"Transcribed text: {transcribed_text}")
-#         if not transcribed_text:
-#             raise HTTPException(status_code=400, detail="Failed to transcribe the audio file.")
-
-#         # Step 3: Convert transcribed text to JSON via LlamaIndex
-#         documents = [Document(text=transcribed_text)]
-#         index = VectorStoreIndex.from_documents(documents)
-#         query_engine = index.as_query_engine()
-#         query = "Convert the following text into a JSON object with the format: { 'name': 'string', 'description': 'string', 'expense': number, 'location': 'string', 'category': 'string', 'repeat': bool, 'interval': 'none', 'daily', 'weekly', 'monthly', 'yearly' }"
-#         response = query_engine.query(query)
-#         json_data = response.response.strip()
-
-#         return JSONResponse(content=json_data)
-
-#     except Exception as e:
-#         raise HTTPException(status_code=500, detail=str(e))
+import mimetypes
+
+import aiofiles
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from ..core.config import settings
+from ..models import VoiceJobPublic
+from ..voice.jobs import RETRY_AFTER, VoiceJobQueue, remove_upload
+
+def voice_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=queue.error or "Voice processing is unavailable",
+        headers={"Retry-After": str(RETRY_AFTER)},
+    )
+
+async def require_voice():
+    await queue.ensure_started()
+    if not queue.available:
+        raise voice_unavailable()
+
+router = APIRouter(
+    prefix="/voice",
+    tags=["Voice"],
+)
+
+queue = VoiceJobQueue(
+    workers=settings.VOICE_WORKERS,
+    upload_dir=settings.VOICE_UPLOAD_DIR,
+    transcriber=settings.VOICE_TRANSCRIBER,
+    transcriber_options=(
+        {"delay": settings.VOICE_STUB_DELAY}
+        if settings.VOICE_TRANSCRIBER == "stub"
+        else {"model": settings.VOICE_TRANSCRIBER_MODEL}
+    ),
+    parser=settings.VOICE_PARSER,
+    parser_options={} if settings.VOICE_PARSER == "stub" else {"model": settings.VOICE_PARSER_MODEL},
+    job_ttl=settings.VOICE_JOB_TTL_SECONDS,
+)
+
+
+# Only new jobs need the workers; finished results stay readable while they are down.
+@router.post(
+    "/jobs",
+    response_model=VoiceJobPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_voice)],
+    responses={503: {"description": "Voice backend is not available"}},
+)
+async def create_voice_job(request: Request, filename: str | None = None):
+    """
+    Queue a voice message to be converted into an activity. Send the audio as the raw request
+    body with its Content-Type (or a `filename` with its extension), then poll the returned job.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.VOICE_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Voice message is too large")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    path = queue.new_upload_path(filename or f"upload{mimetypes.guess_extension(content_type) or ''}")
+    submitted = False
+    try:
+        # Write the body to disk as it arrives, so no more than one chunk is held in memory.
+        size = 0
+        async with aiofiles.open(path, "wb") as out:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > settings.VOICE_MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Voice message is too large")
+                await out.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty voice message")
+        try:
+            job_id = queue.submit(path)
+        except RuntimeError:
+            raise voice_unavailable()  # the pool broke after require_voice
+        submitted = True
+    finally:
+        if not submitted:
+            remove_upload(path)
+    return queue.status(job_id)
+
+
+@router.get("/jobs/{job_id}", response_model=VoiceJobPublic)
+async def get_voice_job(job_id: str):
+    job = queue.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
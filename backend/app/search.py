@@ -0,0 +1,271 @@
+import base64
+import heapq
+import re
+import threading
+from collections import Counter
+from datetime import date
+from functools import lru_cache
+
+from sqlalchemy import Double, and_, cast, event, func, inspect, literal, or_
+from sqlalchemy.orm import Session as OrmSession, object_session
+from sqlmodel import Session, select
+
+from .models import Activity, ActivityPublic, ActivitySearchHit, ActivitySearchPage, Category
+
+# Activity search ranks by trigram similarity, the same measure pg_trgm uses:
+# the mean of similarity and word similarity, taking the better of name and
+# description. On PostgreSQL the GIN trigram indexes on `activity.name` and
+# `activity.description` do the work; other databases (SQLite in tests) use
+# the in-process inverted index below.
+
+# pg_trgm's defaults for the % and <% operators
+SIMILARITY_THRESHOLD = 0.3
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def encode_cursor(score: float, activity_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{activity_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        score, activity_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(score), int(activity_id)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+@lru_cache(maxsize=65536)
+def trigrams(text: str | None) -> frozenset[str]:
+    """Trigrams of every word padded the way pg_trgm does ('  w', ' wo', ...)."""
+    result = set()
+    for word in _WORD.findall((text or "").lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+class ActivitySearchIndex:
+    """Per-account inverted index from trigram to activity ids.
+
+    Test-only fallback for databases without pg_trgm; production search runs
+    on PostgreSQL. It keeps every activity row of every searched account in
+    memory with no eviction, building an account's index costs about 2 s per
+    20k activities on its first search, and queries scan the postings of
+    every query trigram (tens of ms at 20k rows).
+
+    An account's index is dropped whenever a commit writes one of its
+    activities through the ORM, see `_track_activity`. Invalidation is per
+    process, so other workers keep serving their copy. Writes that bypass
+    the ORM must call `invalidate` themselves once committed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._accounts: dict[int, _AccountIndex] = {}
+        # Bumped by every invalidation so a build that raced one is not kept.
+        self._generation = 0
+
+    def invalidate(self, account_id: int | None = None):
+        with self._lock:
+            self._generation += 1
+            if account_id is None:
+                self._accounts.clear()
+            else:
+                self._accounts.pop(account_id, None)
+
+    def _load(self, session: Session, account_id: int) -> "_AccountIndex":
+        with self._lock:
+            index = self._accounts.get(account_id)
+            generation = self._generation
+        if index is None:
+            rows = session.exec(
+                select(*Activity.__table__.columns).where(Activity.account_id == account_id)
+            ).all()
+            index = _AccountIndex(rows)
+            with self._lock:
+                if self._generation == generation:
+                    self._accounts[account_id] = index
+        return index
+
+    def search(
+        self,
+        session: Session,
+        account_id: int,
+        q: str,
+        *,
+        category: Category | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        after: tuple[float, int] | None = None,
+        limit: int = 20,
+    ) -> list[tuple[float, ActivityPublic]]:
+        index = self._load(session, account_id)
+        needle = q.lower()
+        query = trigrams(q)
+        name_overlap = Counter()
+        description_overlap = Counter()
+        for trigram in query:
+            name_overlap.update(index.name_postings.get(trigram, ()))
+            description_overlap.update(index.description_postings.get(trigram, ()))
+        # Queries shorter than a trigram can only be answered by scanning.
+        if len(needle) < 3:
+            candidates = index.rows.keys()
+        else:
+            candidates = name_overlap.keys() | description_overlap.keys()
+
+        scored = []
+        for activity_id in candidates:
+            row = index.rows[activity_id]
+            if category is not None and row.category != category:
+                continue
+            if date_from is not None and row.startDate < date_from:
+                continue
+            if date_to is not None and row.startDate > date_to:
+                continue
+            name_trigrams, description_trigrams = index.sizes[activity_id]
+            name_similarity, name_word_similarity = _similarities(
+                len(query), name_trigrams, name_overlap[activity_id])
+            description_similarity, description_word_similarity = _similarities(
+                len(query), description_trigrams, description_overlap[activity_id])
+            if not (
+                name_similarity >= SIMILARITY_THRESHOLD
+                or name_word_similarity >= WORD_SIMILARITY_THRESHOLD
+                or description_similarity >= SIMILARITY_THRESHOLD
+                or description_word_similarity >= WORD_SIMILARITY_THRESHOLD
+                or needle in row.name.lower()
+                or needle in (row.description or "").lower()
+            ):
+                continue
+            score = max(
+                (name_similarity + name_word_similarity) / 2,
+                (description_similarity + description_word_similarity) / 2,
+            )
+            if after is not None and (score, activity_id) >= after:
+                continue
+            scored.append((score, activity_id))
+
+        return [
+            (score, ActivityPublic.model_validate(index.rows[activity_id]._mapping))
+            for score, activity_id in heapq.nlargest(limit, scored)
+        ]
+
+
+class _AccountIndex:
+    def __init__(self, rows):
+        self.rows = {}
+        self.sizes = {}
+        self.name_postings: dict[str, list[int]] = {}
+        self.description_postings: dict[str, list[int]] = {}
+        for row in rows:
+            name_trigrams = trigrams(row.name)
+            description_trigrams = trigrams(row.description)
+            for trigram in name_trigrams:
+                self.name_postings.setdefault(trigram, []).append(row.activity_id)
+            for trigram in description_trigrams:
+                self.description_postings.setdefault(trigram, []).append(row.activity_id)
+            self.rows[row.activity_id] = row
+            self.sizes[row.activity_id] = (len(name_trigrams), len(description_trigrams))
+
+
+def _similarities(query: int, text: int, overlap: int) -> tuple[float, float]:
+    # Jaccard similarity and the share of the query's trigrams found in the
+    # text. The latter is an upper bound of pg_trgm's word_similarity.
+    if not query:
+        return 0.0, 0.0
+    return overlap / (query + text - overlap), overlap / query
+
+
+activity_index = ActivitySearchIndex()
+
+
+# Flushes only collect the accounts whose activities changed; their indexes
+# are dropped once the transaction commits, so a search running in between
+# cannot cache rows that are about to change. Accounts left over by a
+# rollback only cost an extra rebuild after the session's next commit.
+@event.listens_for(Activity, "after_insert")
+@event.listens_for(Activity, "after_update")
+@event.listens_for(Activity, "after_delete")
+def _track_activity(mapper, connection, target: Activity):
+    accounts = object_session(target).info.setdefault("activity_accounts", set())
+    accounts.add(target.account_id)
+    # moving an activity to another account changes both indexes
+    accounts.update(inspect(target).attrs.account_id.history.deleted)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_activity(session):
+    for account_id in session.info.pop("activity_accounts", ()):
+        activity_index.invalidate(account_id)
+
+
+def postgres_search_statement(account_id, q, *, category=None, date_from=None, date_to=None, after=None, limit=20):
+    description = func.coalesce(Activity.description, "")
+    # Cast the real to double so the score round-trips exactly through the cursor.
+    score = cast(
+        func.greatest(
+            (func.similarity(Activity.name, q) + func.word_similarity(q, Activity.name)) / 2,
+            (func.similarity(description, q) + func.word_similarity(q, description)) / 2,
+        ),
+        Double,
+    ).label("score")
+    pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    statement = select(Activity, score).where(
+        Activity.account_id == account_id,
+        or_(
+            Activity.name.op("%")(q),
+            literal(q).op("<%")(Activity.name),
+            Activity.description.op("%")(q),
+            literal(q).op("<%")(Activity.description),
+            Activity.name.ilike(pattern, escape="\\"),
+            Activity.description.ilike(pattern, escape="\\"),
+        ),
+    )
+    if category is not None:
+        statement = statement.where(Activity.category == category)
+    if date_from is not None:
+        statement = statement.where(Activity.startDate >= date_from)
+    if date_to is not None:
+        statement = statement.where(Activity.startDate <= date_to)
+    if after is not None:
+        last_score, last_id = after
+        statement = statement.where(
+            or_(score < last_score, and_(score == last_score, Activity.activity_id < last_id))
+        )
+    return statement.order_by(score.desc(), Activity.activity_id.desc()).limit(limit)
+
+
+def search_activities(
+    session: Session,
+    account_id: int,
+    q: str,
+    *,
+    category: Category | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: str | None = None,
+    limit: int = 20,
+) -> ActivitySearchPage:
+    after = decode_cursor(cursor) if cursor else None
+    if session.get_bind().dialect.name == "postgresql":
+        statement = postgres_search_statement(
+            account_id, q,
+            category=category, date_from=date_from, date_to=date_to, after=after, limit=limit + 1,
+        )
+        hits = [(float(score), activity) for activity, score in session.exec(statement)]
+    else:
+        hits = activity_index.search(
+            session, account_id, q,
+            category=category, date_from=date_from, date_to=date_to, after=after, limit=limit + 1,
+        )
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1][0], hits[-1][1].activity_id)
+    return ActivitySearchPage(
+        items=[ActivitySearchHit(**activity.model_dump(), score=score) for score, activity in hits],
+        next_cursor=next_cursor,
+    )
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import partial
+from multiprocessing import get_context
+from uuid import uuid4
+
+from pydantic import ValidationError
+
+from ..models import ActivityBase, VoiceJobPublic, VoiceJobStatus
+from .transcriber import ActivityParser, Transcriber, get_parser, get_transcriber
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before trying to start workers again after their backends failed to load.
+RETRY_AFTER = 30
+
+# Set once per worker process by `_init_worker`, so the models are loaded a
+# single time instead of on every job.
+_transcriber: Transcriber | None = None
+_parser: ActivityParser | None = None
+_load_error: str | None = None
+
+
+def _init_worker(transcriber: str, transcriber_options: dict, parser: str, parser_options: dict):
+    # An initializer that raises only leaves a BrokenProcessPool behind, so the
+    # error is kept and reported by `_ping` instead.
+    global _transcriber, _parser, _load_error
+    try:
+        _transcriber = get_transcriber(transcriber, **transcriber_options)
+        _transcriber.load()
+        _parser = get_parser(parser, **parser_options)
+        _parser.load()
+    except Exception as e:
+        _load_error = f"{type(e).__name__}: {e}"
+
+
+def _ping() -> int:
+    if _load_error is not None:
+        raise RuntimeError(_load_error)
+    return os.getpid()
+
+
+def _process_file(path: str) -> dict:
+    if _load_error is not None:
+        raise RuntimeError(_load_error)
+    text = _transcriber.transcribe(path)
+    if not text:
+        raise ValueError("Failed to transcribe the audio file.")
+    return _parser.parse(text)
+
+
+def remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@dataclass
+class _Job:
+    path: str
+    future: Future | None = None  # set once the job is handed to a worker
+    created: float = field(default_factory=time.monotonic)
+
+
+class VoiceJobQueue:
+    """Runs voice jobs on a pool of worker processes.
+
+    Jobs wait in the queue's own deque and are handed to the pool only when a
+    worker is free, so `running` means a worker is on it. If the backends fail
+    to load, `error` says why and `start` may be retried after RETRY_AFTER
+    seconds.
+
+    Job state lives in the memory of the process that owns the queue, so the
+    status endpoint has to be served by the same API worker that accepted the
+    upload.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        upload_dir: str,
+        transcriber: str,
+        parser: str,
+        transcriber_options: dict | None = None,
+        parser_options: dict | None = None,
+        job_ttl: float = 3600,
+    ):
+        self.workers = workers
+        self.upload_dir = upload_dir
+        self.job_ttl = job_ttl
+        self.error: str | None = None
+        self._initargs = (transcriber, transcriber_options or {}, parser, parser_options or {})
+        self._executor: ProcessPoolExecutor | None = None
+        self._failed_at: float | None = None
+        self._start_lock = asyncio.Lock()
+        # Done callbacks run on the executor's management thread.
+        self._lock = threading.RLock()
+        self._jobs: dict[str, _Job] = {}
+        self._pending: deque[str] = deque()
+        self._running = 0
+
+    @property
+    def available(self) -> bool:
+        return self._executor is not None
+
+    async def start(self):
+        os.makedirs(self.upload_dir, exist_ok=True)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+        # Spawn every worker now so the models are resident before the first upload.
+        try:
+            await asyncio.gather(
+                *(asyncio.wrap_future(executor.submit(_ping)) for _ in range(self.workers))
+            )
+        except Exception as e:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.error = f"Voice backend failed to load: {e}"
+            self._failed_at = time.monotonic()
+            logger.error(self.error)
+            return
+        self.error = None
+        self._failed_at = None
+        self._executor = executor
+        self._dispatch()
+
+    async def ensure_started(self):
+        async with self._start_lock:
+            if self._executor is not None:
+                return
+            if self._failed_at is not None and time.monotonic() - self._failed_at < RETRY_AFTER:
+                return
+            await self.start()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            for job_id in self._pending:
+                remove_upload(self._jobs[job_id].path)
+            self._pending.clear()
+            self._jobs.clear()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def new_upload_path(self, filename: str | None = None) -> str:
+        suffix = os.path.splitext(filename or "")[1][:16]
+        return os.path.join(self.upload_dir, f"{uuid4().hex}{suffix}")
+
+    def submit(self, path: str) -> str:
+        if self._executor is None:
+            raise RuntimeError("Voice job queue is not started")
+        job_id = uuid4().hex
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = _Job(path=path)
+            self._pending.append(job_id)
+            self._dispatch()
+        return job_id
+
+    def _dispatch(self):
+        with self._lock:
+            while self._pending and self._running < self.workers and self._executor is not None:
+                job = self._jobs[self._pending[0]]
+                try:
+                    job.future = self._executor.submit(_process_file, job.path)
+                except BrokenProcessPool as e:
+                    # A worker died; keep the job queued until the pool is restarted.
+                    self._executor = None
+                    self.error = f"Voice workers stopped: {e}"
+                    self._failed_at = time.monotonic()
+                    logger.error(self.error)
+                    return
+                self._pending.popleft()
+                self._running += 1
+                job.future.add_done_callback(partial(self._finished, job))
+
+    def _finished(self, job: _Job, future: Future):
+        remove_upload(job.path)
+        with self._lock:
+            self._running -= 1
+            self._dispatch()
+
+    def status(self, job_id: str) -> VoiceJobPublic | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            future = job.future
+            if future is None:
+                return VoiceJobPublic(
+                    job_id=job_id, status=VoiceJobStatus.QUEUED, position=self._pending.index(job_id)
+                )
+        if not future.done():
+            return VoiceJobPublic(job_id=job_id, status=VoiceJobStatus.RUNNING)
+        if future.cancelled():
+            return VoiceJobPublic(job_id=job_id, status=VoiceJobStatus.FAILED, error="Job cancelled")
+        error = future.exception()
+        if error is not None:
+            return VoiceJobPublic(job_id=job_id, status=VoiceJobStatus.FAILED, error=str(error))
+        try:
+            result = ActivityBase.model_validate(future.result())
+        except ValidationError as e:
+            return VoiceJobPublic(job_id=job_id, status=VoiceJobStatus.FAILED, error=str(e))
+        return VoiceJobPublic(job_id=job_id, status=VoiceJobStatus.DONE, result=result)
+
+    def _prune(self):
+        deadline = time.monotonic() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.future is not None and job.future.done() and job.created < deadline
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
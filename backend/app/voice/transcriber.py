@@ -0,0 +1,149 @@
+import json
+import re
+import time
+from abc import ABC, abstractmethod
+
+from ..models import Category, RecurrenceType
+
+# Transcribers turn an audio file into text, parsers turn that text into the
+# fields of an ActivityBase. Both are instantiated once per worker process and
+# `load()` is where heavy models/clients are created, so they stay resident
+# between jobs. A backend missing a method fails when it is instantiated in
+# the worker, so it shows up as a load error rather than on the first job.
+
+
+class Transcriber(ABC):
+    def load(self) -> None:
+        pass
+
+    @abstractmethod
+    def transcribe(self, path: str) -> str:
+        ...
+
+
+class ActivityParser(ABC):
+    def load(self) -> None:
+        pass
+
+    @abstractmethod
+    def parse(self, text: str) -> dict:
+        ...
+
+
+class StubTranscriber(Transcriber):
+    """Reads the upload as UTF-8 text, so tests can post a .txt 'recording'."""
+
+    def __init__(self, model: str | None = None, delay: float = 0.0):
+        self.delay = delay
+
+    def transcribe(self, path: str) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", errors="ignore").strip()
+
+
+class OpenAITranscriber(Transcriber):
+    def __init__(self, model: str | None = None):
+        self.model = model or "whisper-1"
+
+    def load(self) -> None:
+        from openai import OpenAI
+
+        self.client = OpenAI()  # assumes OPENAI_API_KEY is set in your environment
+
+    def transcribe(self, path: str) -> str:
+        with open(path, "rb") as f:
+            response = self.client.audio.transcriptions.create(model=self.model, file=f)
+        return response.text
+
+
+class WhisperTranscriber(Transcriber):
+    def __init__(self, model: str | None = None):
+        self.model_name = model or "base"
+
+    def load(self) -> None:
+        import whisper
+
+        self.model = whisper.load_model(self.model_name)
+
+    def transcribe(self, path: str) -> str:
+        return self.model.transcribe(path)["text"].strip()
+
+
+_AMOUNT = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+class StubParser(ActivityParser):
+    """Keyword based parser with no external dependencies."""
+
+    def parse(self, text: str) -> dict:
+        lowered = text.lower()
+        amount = _AMOUNT.search(lowered)
+        category = next((c for c in Category if c.value.replace("_", " ") in lowered), Category.OTHER)
+        recurrence = next(
+            (r for r in RecurrenceType if r != RecurrenceType.ONCE and r.value in lowered),
+            RecurrenceType.ONCE,
+        )
+        return {
+            "name": text[:255] or "voice note",
+            "description": text,
+            "expense": float(amount.group().replace(",", ".")) if amount else 0.0,
+            "category": category,
+            "recurrenceType": recurrence,
+        }
+
+
+PARSER_PROMPT = (
+    "Extract one expense from the user's message and answer with a JSON object with the keys "
+    "'name' (string), 'description' (string), 'expense' (number), "
+    f"'category' (one of {', '.join(c.value for c in Category)}) and "
+    f"'recurrenceType' (one of {', '.join(r.value for r in RecurrenceType)})."
+)
+
+
+class OpenAIParser(ActivityParser):
+    def __init__(self, model: str | None = None):
+        self.model = model or "gpt-4o-mini"
+
+    def load(self) -> None:
+        from openai import OpenAI
+
+        self.client = OpenAI()
+
+    def parse(self, text: str) -> dict:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": PARSER_PROMPT},
+                {"role": "user", "content": text},
+            ],
+        )
+        return json.loads(response.choices[0].message.content)
+
+
+TRANSCRIBERS: dict[str, type[Transcriber]] = {
+    "stub": StubTranscriber,
+    "openai": OpenAITranscriber,
+    "whisper": WhisperTranscriber,
+}
+
+PARSERS: dict[str, type[ActivityParser]] = {
+    "stub": StubParser,
+    "openai": OpenAIParser,
+}
+
+
+def get_transcriber(name: str, **options) -> Transcriber:
+    try:
+        return TRANSCRIBERS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown transcriber {name!r}, expected one of {sorted(TRANSCRIBERS)}")
+
+
+def get_parser(name: str, **options) -> ActivityParser:
+    try:
+        return PARSERS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown parser {name!r}, expected one of {sorted(PARSERS)}")
@@ -0,0 +1,90 @@
+"""Activity search latency.
+
+Run from `backend/`: python -m benchmarks.activity_search --rows 1000000
+Uses an in-memory SQLite database (and so the in-process index) unless
+--database-url points at PostgreSQL. With --explain, PostgreSQL runs print
+the EXPLAIN (ANALYZE, BUFFERS) plan of every query, which should show the
+GIN trigram indexes in use.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Account, Activity, Category
+from app.search import activity_index, postgres_search_statement, search_activities
+
+WORDS = [
+    "coffee", "groceries", "rent", "netflix", "spotify", "uber", "fuel", "pharmacy", "gym",
+    "lunch", "dinner", "train", "parking", "insurance", "books", "cinema", "pizza", "bakery",
+]
+QUERIES = ["coffee", "cofee", "netflix", "pizza dinner", "insur", "gy", "train ticket"]
+
+
+def seed(engine, rows: int, account_id: int):
+    rng = random.Random(0)
+    categories = list(Category)
+    with Session(engine) as session:
+        session.add(Account(account_id=account_id, first_name="Bench", last_name="Mark",
+                            dob=date(1990, 1, 1), gender=0, country="VN", email="bench@example.com"))
+        session.commit()
+        for start in range(0, rows, 10_000):
+            session.execute(insert(Activity), [
+                {
+                    "account_id": account_id,
+                    "name": " ".join(rng.sample(WORDS, 2)) + f" #{i}",
+                    "description": " ".join(rng.sample(WORDS, 4)),
+                    "category": rng.choice(categories),
+                    "startDate": date(2024, 1, 1) + timedelta(days=rng.randrange(600)),
+                    "expense": rng.randrange(1, 500),
+                }
+                for i in range(start, min(start + 10_000, rows))
+            ])
+        session.commit()
+    activity_index.invalidate(account_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--explain", action="store_true", help="print query plans (PostgreSQL only)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    SQLModel.metadata.create_all(engine)
+    account_id = 1
+    started = time.perf_counter()
+    seed(engine, args.rows, account_id)
+    print(f"seeded {args.rows} activities in {time.perf_counter() - started:.1f}s ({engine.dialect.name})")
+
+    with Session(engine) as session:
+        started = time.perf_counter()
+        search_activities(session, account_id, "warmup")
+        print(f"first search (index build on fallback) {1000 * (time.perf_counter() - started):.0f} ms")
+        for q in QUERIES:
+            for filters in ({}, {"category": Category.DINING_OUT, "date_from": date(2024, 6, 1)}):
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    page = search_activities(session, account_id, q, **filters)
+                    timings.append(1000 * (time.perf_counter() - started))
+                p95 = statistics.quantiles(timings, n=20)[-1]
+                label = q + (" +filters" if filters else "")
+                print(f"{label:<24} p50 {statistics.median(timings):7.2f} ms  p95 {p95:7.2f} ms  hits {len(page.items)}")
+                if args.explain and engine.dialect.name == "postgresql":
+                    statement = postgres_search_statement(account_id, q, **filters, limit=21)
+                    sql = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+                    # psycopg2 still formats a parameterless statement, which undoes the %% escapes
+                    plan = session.connection().exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", ())
+                    for (line,) in plan:
+                        print("    " + line)
+
+
+if __name__ == "__main__":
+    main()
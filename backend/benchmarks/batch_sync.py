@@ -0,0 +1,101 @@
+"""Offline sync latency: one POST per activity against one batch request.
+
+Run from `backend/`: python -m benchmarks.batch_sync --edits 500
+Uses a throwaway SQLite database unless DATABASE_URL is set. Requests go
+through the in-process test client, so --rtt adds an estimate of the
+network round trip per request on top of the measured time. The SQL
+profiler is on, and the run fails if the sync route shows N+1 queries or
+reloads after commit.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("POSTGRES_USER", "bench")
+os.environ.setdefault("POSTGRES_PASSWORD", "bench")
+os.environ.setdefault("POSTGRES_DB", "bench")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/batch.db")
+os.environ.setdefault("SQL_PROFILE", "true")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.db import create_database  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def activity(i: int) -> dict:
+    return {"name": f"coffee {i}", "expense": 3.5, "category": "dining_out", "startDate": "2025-01-01"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--rtt", type=float, default=50.0, help="assumed network round trip, ms")
+    args = parser.parse_args()
+
+    create_database()
+    client = TestClient(app)
+    account = {"first_name": "Bench", "last_name": "Mark", "dob": "1990-01-01", "gender": 0,
+               "country": "VN", "email": "bench@example.com"}
+    account_id = client.post("/account/", json=account).json()["account_id"]
+
+    started = time.perf_counter()
+    for i in range(args.edits):
+        client.post("/activity/", json={**activity(i), "account_id": account_id}).raise_for_status()
+    per_object = time.perf_counter() - started
+
+    operations = [
+        {"key": f"create-{i}", "op": "create", "entity": "activity", "data": activity(i)}
+        for i in range(args.edits)
+    ]
+    started = time.perf_counter()
+    response = client.post(f"/sync/{account_id}", json={"operations": operations})
+    batch = time.perf_counter() - started
+    response.raise_for_status()
+
+    started = time.perf_counter()
+    replay = client.post(f"/sync/{account_id}", json={"operations": operations})
+    retry = time.perf_counter() - started
+    assert [r["id"] for r in replay.json()["results"]] == [r["id"] for r in response.json()["results"]]
+
+    ids = [r["id"] for r in response.json()["results"]]
+    third = args.edits // 3
+    mixed = (
+        [{"key": f"mixed-create-{i}", "op": "create", "entity": "income",
+          "data": {"name": f"gig {i}", "incomeType": "freelance", "amount": 20}} for i in range(third)]
+        + [{"key": f"mixed-update-{i}", "op": "update", "entity": "activity", "id": ids[i],
+            "data": {"expense": 4.0}} for i in range(third)]
+        + [{"key": f"mixed-delete-{i}", "op": "delete", "entity": "activity", "id": ids[-1 - i]}
+           for i in range(args.edits - 2 * third)]
+    )
+    started = time.perf_counter()
+    client.post(f"/sync/{account_id}", json={"operations": mixed}).raise_for_status()
+    mixed_batch = time.perf_counter() - started
+
+    rtt = args.rtt / 1000
+    print(f"{args.edits} edits, +{args.rtt:.0f} ms per round trip")
+    for label, elapsed, requests in [
+        ("per-object POST /activity/", per_object, args.edits),
+        ("batch create", batch, 1),
+        ("batch retry (replayed)", retry, 1),
+        ("batch mixed create/update/delete", mixed_batch, 1),
+    ]:
+        print(f"  {label:<34} {1000 * elapsed:9.1f} ms measured {1000 * (elapsed + requests * rtt):9.1f} ms with RTT")
+
+    profiler = app.state.sql_profiler
+    if profiler is not None:
+        report = profiler.report()
+        print("SQL per request")
+        for route in ("POST /activity/", "POST /sync/{account_id}"):
+            stats = report[route]
+            print(f"  {route:<34} {stats['avg_queries']:6.1f} queries  max {stats['max_queries']}"
+                  f"  requests with reloads {sum(stats['reloads'].values())}")
+        sync = report["POST /sync/{account_id}"]
+        assert not sync["n_plus_one"], sync["n_plus_one"]
+        assert not sync["reloads"], sync["reloads"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Cold start: import time per module and time-to-first-request per router.
+
+Run from `backend/`: python -m benchmarks.startup
+Boots uvicorn against a throwaway SQLite database unless --database-url is
+given, once with FAST_STARTUP off and once with it on.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+MODULES = [
+    "app.core.config",
+    "app.core.db",
+    "app.models",
+    "app.search",
+    "app.voice.jobs",
+    "app.internal.admin",
+    "app.routers.auth",
+    "app.routers.account",
+    "app.routers.activity",
+    "app.routers.voice",
+    "app.main",
+]
+
+ROUTES = {
+    "admin": "/admin/",
+    "auth": "/auth/users/me/",
+    "account": "/account/1",
+    "activity": "/activity/1",
+    "voice": "/voice/jobs/unknown",
+    "sync": "/sync/1",
+}
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def import_time(module: str, env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(url: str) -> bool:
+    try:
+        urllib.request.urlopen(url, timeout=5).read()
+    except urllib.error.HTTPError:
+        pass  # any response means the route is being served
+    except OSError:
+        return False
+    return True
+
+
+def boot(env: dict, timeout: float) -> dict[str, float]:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        timings = {}
+        first, *rest = ROUTES.items()
+        while not request(base + first[1]):
+            if server.poll() is not None or time.perf_counter() - started > timeout:
+                raise RuntimeError("server did not come up")
+            time.sleep(0.01)
+        timings[first[0]] = time.perf_counter() - started
+        for name, path in rest:
+            t = time.perf_counter()
+            request(base + path)
+            timings[name] = time.perf_counter() - t
+        return timings
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            "POSTGRES_USER": "bench",
+            "POSTGRES_PASSWORD": "bench",
+            "POSTGRES_DB": "bench",
+            "VOICE_TRANSCRIBER": "stub",
+            "VOICE_PARSER": "stub",
+            "VOICE_UPLOAD_DIR": os.path.join(tmp, "voice"),
+            **os.environ,
+            "DATABASE_URL": args.database_url or f"sqlite:///{tmp}/startup.db",
+        }
+
+        print("import time (fresh interpreter, includes dependencies)")
+        for module in MODULES:
+            best = min(import_time(module, env) for _ in range(args.repeat))
+            print(f"  {module:<24} {1000 * best:8.1f} ms")
+
+        boot({**env, "FAST_STARTUP": "false"}, args.timeout)  # creates the schema and its stamp
+        for fast in (False, True):
+            runs = [boot({**env, "FAST_STARTUP": str(fast).lower()}, args.timeout) for _ in range(args.repeat)]
+            print(f"time to first request, FAST_STARTUP={fast} (best of {args.repeat})")
+            for i, name in enumerate(ROUTES):
+                best = min(run[name] for run in runs)
+                label = "boot + first request" if i == 0 else "first request"
+                print(f"  {name:<10} {label:<22} {1000 * best:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Voice job throughput against the stub transcriber.
+
+Run from `backend/`: python -m benchmarks.voice_throughput
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.models import VoiceJobStatus
+from app.voice.jobs import VoiceJobQueue
+
+
+async def run(workers: int, jobs: int, delay: float) -> float:
+    with tempfile.TemporaryDirectory() as upload_dir:
+        queue = VoiceJobQueue(
+            workers=workers,
+            upload_dir=upload_dir,
+            transcriber="stub",
+            transcriber_options={"delay": delay},
+            parser="stub",
+        )
+        await queue.start()
+        try:
+            start = time.perf_counter()
+            job_ids = []
+            for i in range(jobs):
+                path = queue.new_upload_path("note.txt")
+                with open(path, "w") as f:
+                    f.write(f"groceries {i}.50 weekly")
+                job_ids.append(queue.submit(path))
+            pending = set(job_ids)
+            while pending:
+                await asyncio.sleep(0.005)
+                pending = {
+                    job_id for job_id in pending
+                    if queue.status(job_id).status in (VoiceJobStatus.QUEUED, VoiceJobStatus.RUNNING)
+                }
+            elapsed = time.perf_counter() - start
+            failed = [job_id for job_id in job_ids if queue.status(job_id).status == VoiceJobStatus.FAILED]
+            assert not failed, queue.status(failed[0]).error
+            return jobs / elapsed
+        finally:
+            queue.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.05, help="simulated model latency per job, seconds")
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        throughput = asyncio.run(run(workers, args.jobs, args.delay))
+        baseline = baseline or throughput
+        print(f"workers={workers:<3} {throughput:8.1f} jobs/s  x{throughput / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
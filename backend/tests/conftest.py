@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when the app is imported, so the test environment has to
+# be in place first: a throwaway SQLite database and the stub voice backends.
+_tmp = tempfile.mkdtemp(prefix="smartspend-tests-")
+os.environ.update({
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "DATABASE_URL": f"sqlite:///{_tmp}/test.db",
+    "FAST_STARTUP": "false",
+    "VOICE_WORKERS": "1",
+    "VOICE_UPLOAD_DIR": os.path.join(_tmp, "voice"),
+    "VOICE_TRANSCRIBER": "stub",
+    "VOICE_PARSER": "stub",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def create_account(client, email):
+    account = {"first_name": "Test", "last_name": "User", "dob": "1990-01-01", "gender": 0,
+               "country": "VN", "email": email}
+    return client.post("/account/", json=account).json()["account_id"]
+
+
+@pytest.fixture
+def account_id(client):
+    return create_account(client, "test@example.com")
+
+
+@pytest.fixture
+def other_account_id(client):
+    return create_account(client, "other@example.com")
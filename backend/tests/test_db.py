@@ -0,0 +1,93 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlmodel import Session, SQLModel, select
+
+from app.core import db
+from app.core.config import settings
+from app.core.db import SchemaVersion, create_database, schema_fingerprint
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/schema.db")
+    monkeypatch.setattr(db, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def stamps(engine):
+    with Session(engine) as session:
+        return session.exec(select(SchemaVersion.version)).all()
+
+
+def test_create_database_stamps(engine):
+    create_database()
+    create_database()  # a second worker finds the stamp already there
+    assert stamps(engine) == [schema_fingerprint()]
+
+
+def test_create_database_replaces_old_stamp(engine):
+    create_database()
+    with Session(engine) as session:
+        session.add(SchemaVersion(version="old"))
+        session.commit()
+    create_database()
+    assert stamps(engine) == [schema_fingerprint()]
+
+
+def test_create_database_adds_missing_indexes(engine):
+    create_database()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_activity_account_id")
+    create_database()
+    assert "ix_activity_account_id" in {index["name"] for index in inspect(engine).get_indexes("activity")}
+
+
+def test_create_database_skips_stamp_when_columns_missing(engine, caplog):
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE income (income_id INTEGER PRIMARY KEY, account_id INTEGER)")
+    with caplog.at_level(logging.WARNING):
+        create_database()
+    assert stamps(engine) == []
+    assert "income.name" in caplog.text
+
+
+@pytest.fixture
+def fast_startup(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_STARTUP", True)
+
+
+def test_fast_startup_trusts_matching_stamp(engine, fast_startup, monkeypatch):
+    create_database()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the schema should not be checked")
+
+    monkeypatch.setattr(SQLModel.metadata, "create_all", fail)
+    monkeypatch.setattr(db, "missing_columns", fail)
+    monkeypatch.setattr(db, "create_indexes", fail)
+    create_database()
+    assert len(statements) == 1
+    assert "FROM schema_version" in statements[0]
+
+
+def test_fast_startup_restamps_stale_schema(engine, fast_startup):
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(SchemaVersion(version="old"))
+        session.commit()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_activity_account_id")
+    create_database()
+    assert stamps(engine) == [schema_fingerprint()]
+    assert "ix_activity_account_id" in {index["name"] for index in inspect(engine).get_indexes("activity")}
+
+
+def test_fast_startup_bootstraps_empty_database(engine, fast_startup):
+    create_database()  # no schema_version table: the lookup fails and falls through
+    assert stamps(engine) == [schema_fingerprint()]
+    assert "activity" in inspect(engine).get_table_names()
@@ -0,0 +1,181 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app.core import profiler as profiler_module
+from app.core.db import engine as app_engine
+from app.core.profiler import (
+    N_PLUS_ONE_THRESHOLD,
+    Query,
+    RequestProfile,
+    SQLProfiler,
+    SQLProfilerMiddleware,
+    _current,
+    fingerprint,
+)
+from app.main import app as smartspend_app
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    SQLProfiler().instrument(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def profile():
+    profile = RequestProfile(route="GET /test")
+    token = _current.set(profile)
+    yield profile
+    _current.reset(token)
+
+
+def test_failed_statement_leaves_no_state(engine, profile):
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+        assert not any(key.startswith("sql_profile") for key in conn.info)
+    assert [q.fingerprint for q in profile.queries] == ["SELECT ?"]
+
+
+def test_unmatched_routes_share_one_entry():
+    profiler = SQLProfiler(always=True)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {}
+
+    app.add_middleware(SQLProfilerMiddleware, profiler=profiler)
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    for i in range(5):
+        assert client.get(f"/nowhere/{i}").status_code == 404
+    report = profiler.report()
+    assert sorted(report) == ["GET /items/{item_id}", "GET <unmatched>"]
+    assert report["GET <unmatched>"]["requests"] == 5
+
+
+def test_sql_profile_requires_admin_token(client):
+    assert client.get("/admin/sql-profile").status_code == 422
+    assert client.get("/admin/sql-profile", headers={"admin-token": "wrong"}).status_code == 400
+    # profiling is off in the test app
+    assert client.get("/admin/sql-profile", headers={"admin-token": "leducphu"}).status_code == 404
+
+
+
+def query(statement, rows=None):
+    return Query(statement, fingerprint(statement), 1.0, rows)
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM t WHERE a = 'it''s' AND b = 4.5", "SELECT * FROM t WHERE a = ? AND b = ?"),
+    ("SELECT a FROM t WHERE id = %(id_1)s AND x = %s", "SELECT a FROM t WHERE id = ? AND x = ?"),
+    ("SELECT a\n  FROM t WHERE id = ? AND x = :x", "SELECT a FROM t WHERE id = ? AND x = ?"),
+    ("SELECT a FROM t WHERE id IN (?, ?, ?)", "SELECT a FROM t WHERE id IN (...)"),
+    ("SELECT a FROM t WHERE id IN (%(p_1)s, %(p_2)s)", "SELECT a FROM t WHERE id IN (...)"),
+    ("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)", "INSERT INTO t (a, b) VALUES (...)"),
+])
+def test_fingerprint(statement, expected):
+    assert fingerprint(statement) == expected
+
+
+def test_n_plus_one_threshold():
+    profile = RequestProfile(route="GET /test")
+    for i in range(N_PLUS_ONE_THRESHOLD - 1):
+        profile.record(query(f"SELECT name FROM activity WHERE activity.account_id = {i}"))
+        profile.record(query(f"UPDATE activity SET name = 'x' WHERE activity.activity_id = {i}"))
+    assert profile.n_plus_one == {}
+    profile.record(query("SELECT name FROM activity WHERE activity.account_id = 99"))
+    assert profile.n_plus_one == {"SELECT name FROM activity WHERE activity.account_id = ?": N_PLUS_ONE_THRESHOLD}
+
+
+def test_reload_after_commit():
+    reload = "SELECT activity.name FROM activity WHERE activity.activity_id = ?"
+    profile = RequestProfile(route="POST /activity/")
+    profile.record(query("INSERT INTO activity (name) VALUES (?)"))
+    profile.record(query(reload))  # same transaction, nothing committed yet
+    profile.record(query("SELECT account.email FROM account WHERE account.account_id = ?"))
+    assert profile.reloads == []
+    profile.commit()
+    profile.record(query("SELECT account.email FROM account WHERE account.account_id = ?"))  # not written
+    profile.record(query("SELECT activity.name FROM activity WHERE activity.account_id = ? LIMIT ?"))  # not by key
+    assert profile.reloads == []
+    profile.record(query(reload))
+    assert profile.reloads == [reload]
+
+
+@pytest.mark.parametrize("headers, wanted", [
+    ([], False),
+    ([(b"x-sql-profile", b"1")], True),
+    ([(b"x-sql-profile", b"yes")], True),
+    ([(b"x-sql-profile", b"0")], False),
+    ([(b"x-sql-profile", b"false")], False),
+    ([(b"x-sql-profile", b"")], False),
+    ([(b"x-other", b"1")], False),
+])
+def test_wants_header(headers, wanted):
+    assert SQLProfiler(header="X-SQL-Profile").wants({"headers": headers}) is wanted
+    assert SQLProfiler(always=True).wants({"headers": headers}) is True
+    assert SQLProfiler().wants({"headers": headers}) is False
+
+
+def test_report_aggregates():
+    profiler = SQLProfiler()
+    first = RequestProfile(route="GET /items")
+    first.record(query("SELECT a FROM t WHERE id = 1", rows=2))
+    first.record(query("SELECT a FROM t WHERE id = 2", rows=3))
+    first.record(query("SELECT b FROM u"))
+    first.commit()
+    second = RequestProfile(route="GET /items")
+    second.record(query("SELECT a FROM t WHERE id = 3", rows=1))
+    profiler.add(first)
+    profiler.add(second)
+
+    report = profiler.report()["GET /items"]
+    assert report["requests"] == 2
+    assert report["queries"] == 4
+    assert report["max_queries"] == 3
+    assert report["avg_queries"] == 2
+    assert report["commits"] == 1
+    assert report["duration_ms"] == 4.0
+    assert report["fingerprints"]["SELECT a FROM t WHERE id = ?"] == {"count": 3, "duration_ms": 3.0, "rows": 6}
+    assert report["fingerprints"]["SELECT b FROM u"]["rows"] is None
+    assert list(report["fingerprints"])[0] == "SELECT a FROM t WHERE id = ?"
+
+    profiler.reset()
+    assert profiler.report() == {}
+
+
+@pytest.fixture
+def profiled_client(client):
+    profiler = SQLProfiler(header="X-SQL-Profile")
+    profiler.instrument(app_engine)
+    yield TestClient(SQLProfilerMiddleware(smartspend_app, profiler)), profiler
+    event.remove(app_engine, "before_cursor_execute", profiler_module._before_cursor_execute)
+    event.remove(app_engine, "after_cursor_execute", profiler_module._after_cursor_execute)
+    event.remove(app_engine, "commit", profiler_module._commit)
+
+
+def test_profiled_request_reports_reload(profiled_client, account_id):
+    client, profiler = profiled_client
+    activity = {"account_id": account_id, "name": "Coffee", "category": "dining_out"}
+
+    response = client.post("/activity/", json=activity)
+    assert "x-sql-queries" not in response.headers  # not asked for
+
+    response = client.post("/activity/", json=activity, headers={"X-SQL-Profile": "1"})
+    assert response.status_code == 200
+    # the commit expires the new row, so returning it selects it again
+    assert response.headers["x-sql-warnings"] == "reload"
+    assert int(response.headers["x-sql-queries"]) == 2
+    report = profiler.report()
+    assert list(report) == ["POST /activity/"]
+    assert report["POST /activity/"]["requests"] == 1
+    assert len(report["POST /activity/"]["reloads"]) == 1
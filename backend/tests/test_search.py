@@ -0,0 +1,137 @@
+import threading
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import Activity
+from app import search
+from app.search import activity_index, decode_cursor, encode_cursor
+
+
+def add_activity(client, account_id, name, category="groceries", **fields):
+    activity = {"account_id": account_id, "name": name, "category": category, "startDate": "2024-01-15", **fields}
+    response = client.post("/activity/", json=activity)
+    assert response.status_code == 200
+    return response.json()["activity_id"]
+
+
+def search_page(client, account_id, q, **params):
+    response = client.get(f"/activity/search/{account_id}", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def names(page):
+    return [item["name"] for item in page["items"]]
+
+
+def test_search_ranking(client, account_id):
+    add_activity(client, account_id, "Coffee")
+    add_activity(client, account_id, "Coffee beans")
+    add_activity(client, account_id, "Rent", category="rent", description="monthly coffee shop lease")
+    add_activity(client, account_id, "Electricity", category="utilities")
+
+    page = search_page(client, account_id, "coffee")
+    assert names(page) == ["Coffee", "Coffee beans", "Rent"]
+    scores = [item["score"] for item in page["items"]]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == 1.0
+
+
+def test_search_fuzzy(client, account_id):
+    add_activity(client, account_id, "Electricity bill", category="utilities")
+    assert names(search_page(client, account_id, "electricty")) == ["Electricity bill"]
+    assert names(search_page(client, account_id, "water")) == []
+
+
+def test_search_filters(client, account_id):
+    add_activity(client, account_id, "Gym membership", category="gym", startDate="2024-01-01")
+    add_activity(client, account_id, "Gym shoes", category="shopping", startDate="2024-03-01")
+    add_activity(client, account_id, "Gym towel", category="shopping", startDate="2024-06-01")
+
+    assert names(search_page(client, account_id, "gym", category="gym")) == ["Gym membership"]
+    assert sorted(names(search_page(client, account_id, "gym", date_from="2024-02-01"))) == ["Gym shoes", "Gym towel"]
+    assert names(search_page(client, account_id, "gym", category="shopping", date_to="2024-04-01")) == ["Gym shoes"]
+
+
+def test_search_pagination(client, account_id):
+    for i in range(7):
+        add_activity(client, account_id, f"Taxi ride {i}", category="public_transport")
+
+    seen = []
+    page = search_page(client, account_id, "taxi", limit=3)
+    while True:
+        assert len(page["items"]) <= 3
+        seen.extend(item["activity_id"] for item in page["items"])
+        if page["next_cursor"] is None:
+            break
+        page = search_page(client, account_id, "taxi", limit=3, cursor=page["next_cursor"])
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_search_invalid_cursor(client, account_id):
+    response = client.get(f"/activity/search/{account_id}", params={"q": "taxi", "cursor": "nope"})
+    assert response.status_code == 400
+
+
+def test_search_sees_new_activity(client, account_id):
+    assert names(search_page(client, account_id, "parking")) == []
+    add_activity(client, account_id, "Parking", category="parking")
+    assert names(search_page(client, account_id, "parking")) == ["Parking"]
+
+
+def test_search_sees_sync(client, account_id):
+    activity_id = add_activity(client, account_id, "Netflix", category="subscriptions")
+    assert names(search_page(client, account_id, "netflix")) == ["Netflix"]
+
+    response = client.post(f"/sync/{account_id}", json={"operations": [
+        {"key": "rename", "op": "update", "entity": "activity", "id": activity_id, "data": {"name": "Spotify"}},
+        {"key": "add", "op": "create", "entity": "activity", "data": {"name": "Netflix family", "category": "subscriptions"}},
+    ]})
+    assert response.status_code == 200
+    assert names(search_page(client, account_id, "netflix")) == ["Netflix family"]
+    assert names(search_page(client, account_id, "spotify")) == ["Spotify"]
+
+
+def test_search_sees_account_change(client, account_id, other_account_id):
+    other_id = other_account_id
+    activity_id = add_activity(client, account_id, "Pharmacy", category="pharmacy")
+    assert names(search_page(client, account_id, "pharmacy")) == ["Pharmacy"]
+    assert names(search_page(client, other_id, "pharmacy")) == []
+
+    with Session(engine) as session:
+        session.get(Activity, activity_id).account_id = other_id
+        session.commit()
+    assert names(search_page(client, account_id, "pharmacy")) == []
+    assert names(search_page(client, other_id, "pharmacy")) == ["Pharmacy"]
+
+
+def test_index_waits_for_commit(client, account_id):
+    with Session(engine) as session:
+        session.add(Activity(account_id=account_id, name="Insurance", category="insurance"))
+        session.flush()
+        # A search during the open transaction must not be able to cache an
+        # index that is already stale once it commits.
+        reader = threading.Thread(target=search_page, args=(client, account_id, "insurance"))
+        reader.start()
+        reader.join()
+        session.commit()
+    assert names(search_page(client, account_id, "insurance")) == ["Insurance"]
+
+
+def test_index_build_racing_invalidation(account_id, monkeypatch):
+    # An invalidation that lands while an index is being built wins.
+    build = search._AccountIndex
+
+    def racing_build(rows):
+        activity_index.invalidate(account_id)
+        return build(rows)
+
+    monkeypatch.setattr(search, "_AccountIndex", racing_build)
+    with Session(engine) as session:
+        activity_index.search(session, account_id, "anything")
+    assert account_id not in activity_index._accounts
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(0.5714285714285714, 42)) == (0.5714285714285714, 42)
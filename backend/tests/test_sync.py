@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.crud import apply_batch
+from app.models import IdempotencyKey
+from app.routers import sync as sync_router
+
+
+def sync(client, account_id, *operations):
+    return client.post(f"/sync/{account_id}", json={"operations": list(operations)})
+
+
+def create(key, name="Lunch"):
+    return {"key": key, "op": "create", "entity": "activity", "data": {"name": name, "category": "dining_out"}}
+
+
+def activities(client, account_id):
+    return {a["activity_id"]: a for a in client.get(f"/activity/{account_id}").json()}
+
+
+def recorded_keys(account_id):
+    with Session(engine) as session:
+        return session.exec(select(IdempotencyKey.key).where(IdempotencyKey.account_id == account_id)).all()
+
+
+def test_sync_invalid_operation_rolls_back_batch(client, account_id):
+    response = sync(client, account_id, create("ok"), {
+        "key": "bad", "op": "create", "entity": "activity", "data": {"name": "Taxi", "category": "teleport"},
+    })
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Operation 1:")
+    assert activities(client, account_id) == {}
+    assert recorded_keys(account_id) == []
+
+
+def test_sync_updates_and_deletes(client, account_id):
+    lunch_id, dinner_id = [r["id"] for r in sync(client, account_id, create("a"), {
+        "key": "b", "op": "create", "entity": "activity",
+        "data": {"name": "Dinner", "category": "dining_out", "expense": 30, "description": "with friends"},
+    }).json()["results"]]
+
+    response = sync(client, account_id,
+        {"key": "c", "op": "update", "entity": "activity", "id": dinner_id, "data": {"expense": 45}},
+        {"key": "d", "op": "delete", "entity": "activity", "id": lunch_id},
+    )
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()["results"]] == [dinner_id, lunch_id]
+    rows = activities(client, account_id)
+    assert list(rows) == [dinner_id]
+    # the update only carried the expense, the rest of the row is kept
+    assert rows[dinner_id]["expense"] == 45
+    assert rows[dinner_id]["name"] == "Dinner"
+    assert rows[dinner_id]["description"] == "with friends"
+
+
+def test_sync_rejects_other_accounts_rows(client, account_id, other_account_id):
+    [theirs] = [r["id"] for r in sync(client, other_account_id, create("a")).json()["results"]]
+    for op in ({"op": "update", "data": {"name": "Mine now"}}, {"op": "delete"}):
+        response = sync(client, account_id, create("x"), {"key": "y", "entity": "activity", "id": theirs, **op})
+        assert response.status_code == 422
+        assert "not found" in response.json()["detail"]
+    assert activities(client, other_account_id)[theirs]["name"] == "Lunch"
+    assert activities(client, account_id) == {}
+
+
+def test_sync_concurrent_duplicate_replays(client, account_id, monkeypatch):
+    attempts = []
+
+    def racing_apply_batch(session, account_id, operations, **kwargs):
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            # Another request with the same batch commits first...
+            with Session(engine) as other:
+                apply_batch(other, account_id, operations, **kwargs)
+                other.commit()
+            # ...so this one's key insert hits the primary key.
+            session.add(IdempotencyKey(account_id=account_id, key=operations[0].key,
+                                       op=operations[0].op, entity=operations[0].entity, entity_id=0))
+            session.flush()
+        return apply_batch(session, account_id, operations, **kwargs)
+
+    monkeypatch.setattr(sync_router, "apply_batch", racing_apply_batch)
+    response = sync(client, account_id, create("a"), create("b", "Dinner"))
+    assert response.status_code == 200
+    assert len(attempts) == 2
+    assert all(r["replayed"] for r in response.json()["results"])
+    assert sorted(a["name"] for a in activities(client, account_id).values()) == ["Dinner", "Lunch"]
+
+
+def test_sync_replays_keys(client, account_id):
+    first = sync(client, account_id, create("a"), create("b", "Dinner"))
+    assert first.status_code == 200
+    again = sync(client, account_id, create("a"), create("b", "Dinner"))
+    assert again.status_code == 200
+    assert [r["id"] for r in again.json()["results"]] == [r["id"] for r in first.json()["results"]]
+    assert all(r["replayed"] for r in again.json()["results"])
+    assert len(client.get(f"/activity/{account_id}").json()) == 2
+
+
+def test_sync_rejects_key_reused_for_other_id(client, account_id):
+    first_id, second_id = [r["id"] for r in sync(client, account_id, create("a"), create("b")).json()["results"]]
+    assert sync(client, account_id, {"key": "rm", "op": "delete", "entity": "activity", "id": first_id}).status_code == 200
+
+    response = sync(client, account_id, {"key": "rm", "op": "delete", "entity": "activity", "id": second_id})
+    assert response.status_code == 422
+    assert "different operation" in response.json()["detail"]
+    assert [a["activity_id"] for a in client.get(f"/activity/{account_id}").json()] == [second_id]
+
+
+def test_sync_prunes_expired_keys(client, account_id):
+    sync(client, account_id, create("old"))
+    with Session(engine) as session:
+        record = session.get(IdempotencyKey, (account_id, "old"))
+        record.created_at = datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS + 1)
+        session.add(record)
+        session.commit()
+
+    assert sync(client, account_id, create("new")).status_code == 200
+    with Session(engine) as session:
+        assert session.get(IdempotencyKey, (account_id, "old")) is None
+        assert session.get(IdempotencyKey, (account_id, "new")) is not None
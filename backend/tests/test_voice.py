@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models import VoiceJobStatus
+from app.routers import voice
+from app.voice import jobs
+from app.voice.jobs import RETRY_AFTER, VoiceJobQueue
+from app.voice.transcriber import TRANSCRIBERS, Transcriber
+
+
+def wait_for(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/voice/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def make_queue(tmp_path, **options):
+    return VoiceJobQueue(
+        workers=1,
+        upload_dir=str(tmp_path),
+        transcriber=options.pop("transcriber", "stub"),
+        transcriber_options=options.pop("transcriber_options", {}),
+        parser="stub",
+    )
+
+
+def test_voice_job_done(client):
+    response = client.post("/voice/jobs", content=b"dining out 12.5 monthly", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 202
+
+    job = wait_for(client, response.json()["job_id"])
+    assert job["status"] == "done"
+    assert job["result"]["expense"] == 12.5
+    assert job["result"]["category"] == "dining_out"
+    assert job["result"]["recurrenceType"] == "monthly"
+    assert os.listdir(settings.VOICE_UPLOAD_DIR) == []
+
+
+def test_voice_job_failed(client):
+    response = client.post("/voice/jobs", content=b"   ", params={"filename": "note.txt"})
+    job = wait_for(client, response.json()["job_id"])
+    assert job["status"] == "failed"
+    assert "transcribe" in job["error"]
+
+
+def test_voice_job_unknown(client):
+    assert client.get("/voice/jobs/missing").status_code == 404
+
+
+def test_voice_upload_empty(client):
+    response = client.post("/voice/jobs", content=b"")
+    assert response.status_code == 400
+    assert os.listdir(settings.VOICE_UPLOAD_DIR) == []
+
+
+def test_voice_upload_too_large(client, monkeypatch):
+    monkeypatch.setattr(settings, "VOICE_MAX_UPLOAD_BYTES", 8)
+    response = client.post("/voice/jobs", content=b"groceries 10 weekly")
+    assert response.status_code == 413
+    assert os.listdir(settings.VOICE_UPLOAD_DIR) == []
+
+
+def test_voice_upload_too_large_streamed(client, monkeypatch):
+    # Without Content-Length the limit is enforced while the body streams in.
+    monkeypatch.setattr(settings, "VOICE_MAX_UPLOAD_BYTES", 8)
+    response = client.post("/voice/jobs", content=iter([b"groceries ", b"10 weekly"]))
+    assert response.status_code == 413
+    assert os.listdir(settings.VOICE_UPLOAD_DIR) == []
+
+
+def test_voice_queue_states(tmp_path):
+    async def run():
+        queue = make_queue(tmp_path, transcriber_options={"delay": 0.3})
+        await queue.start()
+        try:
+            job_ids = []
+            for text in ("rent 500", "fuel 40", "gym 20"):
+                path = queue.new_upload_path("note.txt")
+                with open(path, "w") as f:
+                    f.write(text)
+                job_ids.append(queue.submit(path))
+
+            states = [queue.status(job_id) for job_id in job_ids]
+            assert [s.status for s in states] == [VoiceJobStatus.RUNNING, VoiceJobStatus.QUEUED, VoiceJobStatus.QUEUED]
+            assert [s.position for s in states[1:]] == [0, 1]
+
+            while queue.status(job_ids[-1]).status != VoiceJobStatus.DONE:
+                await asyncio.sleep(0.05)
+            assert [queue.status(job_id).result.expense for job_id in job_ids] == [500, 40, 20]
+        finally:
+            queue.shutdown()
+
+    asyncio.run(run())
+
+
+def test_voice_backend_load_failure(tmp_path):
+    async def run():
+        queue = make_queue(tmp_path, transcriber="missing")
+        await queue.start()
+        assert not queue.available
+        assert "Unknown transcriber" in queue.error
+        await queue.ensure_started()  # within RETRY_AFTER: no new attempt
+        assert not queue.available
+
+    asyncio.run(run())
+
+
+def test_voice_unavailable_returns_503(client, monkeypatch, tmp_path):
+    broken = make_queue(tmp_path, transcriber="missing")
+    asyncio.run(broken.start())
+    monkeypatch.setattr(voice, "queue", broken)
+
+    response = client.post("/voice/jobs", content=b"rent 500")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(RETRY_AFTER)
+    assert "Unknown transcriber" in response.json()["detail"]
+    assert client.get("/voice/jobs/anything").status_code == 404
+    # The rest of the API is unaffected.
+    assert client.get("/admin/").status_code == 200
+
+
+def test_voice_results_readable_while_unavailable(client, monkeypatch):
+    job_id = client.post("/voice/jobs", content=b"rent 500", params={"filename": "note.txt"}).json()["job_id"]
+    assert wait_for(client, job_id)["status"] == "done"
+
+    # e.g. a crashed worker took the pool down and the retry is not due yet
+    monkeypatch.setattr(voice.queue, "_executor", None)
+    monkeypatch.setattr(voice.queue, "_failed_at", time.monotonic())
+    job = client.get(f"/voice/jobs/{job_id}").json()
+    assert job["status"] == "done"
+    assert job["result"]["expense"] == 500
+    assert client.post("/voice/jobs", content=b"rent 500").status_code == 503
+
+
+def test_voice_pool_breaking_before_submit_returns_503(client, monkeypatch):
+    def broken_submit(path):
+        raise RuntimeError("Voice job queue is not started")
+
+    monkeypatch.setattr(voice.queue, "submit", broken_submit)
+    response = client.post("/voice/jobs", content=b"rent 500")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(RETRY_AFTER)
+    assert os.listdir(settings.VOICE_UPLOAD_DIR) == []
+
+
+def test_voice_incomplete_backend_fails_to_load(monkeypatch):
+    class Incomplete(Transcriber):
+        pass  # no transcribe()
+
+    monkeypatch.setitem(TRANSCRIBERS, "incomplete", Incomplete)
+    for name in ("_transcriber", "_parser", "_load_error"):
+        monkeypatch.setattr(jobs, name, None)
+    jobs._init_worker("incomplete", {}, "stub", {})
+    assert jobs._load_error.startswith("TypeError: Can't instantiate abstract class Incomplete")